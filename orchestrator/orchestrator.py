@@ -1,23 +1,45 @@
 # orchestrator/orchestrator.py
 
 #!/usr/bin/env python3
+import os
 import sys
+import json
 import subprocess
 import yaml
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 SCRIPT_DIR = Path(__file__).parent
 ROOT_DIR = SCRIPT_DIR.parent
 CONFIG_FILE = SCRIPT_DIR / "orchestrator.yaml"
 LIBS_DIR = ROOT_DIR / "libs"
 LOG_DIR = ROOT_DIR / "logs"
+CONFIG_CACHE = LOG_DIR / ".config.cache.json"
+MAX_WORKERS = 8
+
+_dirs_ready = set()
+
+
+def ensure_dir(path):
+    # Every dependency shares LIBS_DIR, so each directory is created once
+    # per process instead of once per caller.
+    key = str(path)
+    if key not in _dirs_ready:
+        path.mkdir(parents=True, exist_ok=True)
+        _dirs_ready.add(key)
 
 
 def setup_logging():
-    LOG_DIR.mkdir(exist_ok=True)
+    ensure_dir(LOG_DIR)
     logging.basicConfig(
         level=logging.INFO,
         format='[%(asctime)s] [%(levelname)s] %(message)s',
@@ -29,21 +51,121 @@ def setup_logging():
     return logging.getLogger(__name__)
 
 
-def run_cmd(cmd, cwd=None):
-    result = subprocess.run(cmd, shell=True, cwd=cwd)
+def load_config(path):
+    # Memoized per process; the returned config is shared and must be
+    # treated as read-only.
+    stat = path.stat()
+    return _load_config(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _load_config(path, mtime_ns, size):
+    # Parsed config is cached keyed on the YAML file's (mtime, size), so
+    # repeated invocations skip the YAML parser until the file changes.
+    key = [path, mtime_ns, size]
+
+    try:
+        with open(CONFIG_CACHE) as f:
+            if json.loads(f.readline()) == key:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    with open(path) as f:
+        config = yaml.load(f, Loader=SafeLoader)
+
+    # Only cache configs that survive a JSON round trip unchanged; dates and
+    # non-string keys would otherwise come back different on a cache hit.
+    try:
+        payload = json.dumps(config)
+    except (TypeError, ValueError):
+        return config
+    if json.loads(payload) != config:
+        return config
+
+    tmp_file = CONFIG_CACHE.with_name(f"{CONFIG_CACHE.name}.{os.getpid()}.tmp")
+    try:
+        ensure_dir(LOG_DIR)
+        with open(tmp_file, 'w') as f:
+            f.write(json.dumps(key) + "\n")
+            f.write(payload)
+        os.replace(tmp_file, CONFIG_CACHE)
+    except OSError:
+        tmp_file.unlink(missing_ok=True)
+    return config
+
+
+def run_cmd(cmd, logger, cwd=None):
+    try:
+        result = subprocess.run(cmd, cwd=cwd)
+    except OSError as e:
+        logger.error(f"Could not run {cmd[0]}: {e}")
+        return False
     return result.returncode == 0
 
 
-def clone_or_update(name, url, branch, target_dir, logger):
+def cmd_output(cmd, logger, cwd=None):
+    try:
+        result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    except OSError as e:
+        logger.error(f"Could not run {cmd[0]}: {e}")
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def has_local_work(target_dir, logger):
+    # Uncommitted edits to tracked files, or commits that are not on any
+    # remote branch, would be lost by resetting to the fetched tip.
+    status = cmd_output(["git", "status", "--porcelain", "--untracked-files=no"], logger, cwd=target_dir)
+    unpushed = cmd_output(["git", "rev-list", "HEAD", "--not", "--remotes"], logger, cwd=target_dir)
+    if status is None or unpushed is None:
+        return True
+    return bool(status.strip() or unpushed.strip())
+
+
+def update_checkout(name, branch, target_dir, logger, full_history):
+    if full_history:
+        # A checkout first cloned shallow keeps its graft until unshallowed
+        if (target_dir / ".git" / "shallow").exists():
+            if not run_cmd(["git", "fetch", "--quiet", "--unshallow", "origin"], logger, cwd=target_dir):
+                return False
+        return run_cmd(["git", "pull", "--quiet", "origin", branch], logger, cwd=target_dir)
+
+    if has_local_work(target_dir, logger):
+        logger.error(f"{name} has uncommitted changes or local commits in {target_dir}; not updating")
+        return False
+    # An explicit refspec keeps origin/<branch> in step even for single-branch
+    # clones whose configured branch has since changed; has_local_work relies
+    # on the checked-out tip being on a remote-tracking ref.
+    refspec = f"+refs/heads/{branch}:refs/remotes/origin/{branch}"
+    return (run_cmd(["git", "fetch", "--quiet", "--depth", "1", "origin", refspec], logger, cwd=target_dir)
+            and run_cmd(["git", "reset", "--quiet", "--hard", "FETCH_HEAD"], logger, cwd=target_dir))
+
+
+def clone_or_update(name, url, branch, target_dir, logger, full_history=False):
+    # git runs with --quiet: several checkouts are fetched at once, and their
+    # progress output would bury errors and credential prompts.
+    #
+    # Only the branch tip is needed to deploy, so checkouts are shallow and
+    # blobless unless the config asks for full_history.
     if target_dir.exists():
+        # Checkouts live inside the orchestrator's own work tree, so git run in
+        # a directory that is not a repository would act on this repo instead.
+        if not (target_dir / ".git").exists():
+            logger.error(f"{target_dir} exists but is not a git checkout; not updating {name}")
+            return False
         logger.info(f"Updating {name} from {branch}...")
-        success = run_cmd(f"git pull origin {branch}", cwd=target_dir)
+        success = update_checkout(name, branch, target_dir, logger, full_history)
         if success:
             logger.info(f"{name} updated")
         return success
     else:
         logger.info(f"Cloning {name} from {url}...")
-        success = run_cmd(f"git clone -b {branch} {url} {target_dir}")
+        if full_history:
+            success = run_cmd(["git", "clone", "--quiet", "-b", branch, url, str(target_dir)], logger)
+        else:
+            success = run_cmd(["git", "clone", "--quiet", "--depth", "1", "--filter=blob:none", "--single-branch",
+                               "-b", branch, url, str(target_dir)], logger)
         if success:
             logger.info(f"{name} cloned")
         return success
@@ -53,12 +175,41 @@ def fetch_dependency(dep_name, dep_config, logger):
     url = dep_config['url']
     branch = dep_config.get('branch', 'main')
     path = dep_config['path']
+    full_history = dep_config.get('full_history', False)
 
     dep_path = LIBS_DIR / path
-    dep_path.parent.mkdir(parents=True, exist_ok=True)
+    ensure_dir(dep_path.parent)
 
     logger.info(f"Fetching dependency: {dep_name}")
-    return clone_or_update(dep_name, url, branch, dep_path, logger)
+    return clone_or_update(dep_name, url, branch, dep_path, logger, full_history)
+
+
+def submit_dependencies(executor, deps, all_deps, logger):
+    # Entries that share a path are one checkout, so each path is fetched
+    # once and its result counts for every entry that uses it.
+    by_path = {}
+    for dep in dict.fromkeys(deps):
+        if dep in all_deps:
+            by_path.setdefault(LIBS_DIR / all_deps[dep]['path'], []).append(dep)
+    return {executor.submit(fetch_dependency, names[0], all_deps[names[0]], logger): names
+            for names in by_path.values()}
+
+
+def wait_dependencies(futures, logger):
+    failed = set()
+    for i, future in enumerate(as_completed(futures), 1):
+        names = futures[future]
+        if future.result():
+            logger.info(f"[{i}/{len(futures)}] {', '.join(names)} done")
+        else:
+            logger.error(f"[{i}/{len(futures)}] {', '.join(names)} failed")
+            failed.update(names)
+    return failed
+
+
+def fetch_dependencies(deps, all_deps, logger):
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(deps) or 1)) as executor:
+        return wait_dependencies(submit_dependencies(executor, deps, all_deps, logger), logger)
 
 
 def fetch_all_libs(config, logger):
@@ -71,13 +222,36 @@ def fetch_all_libs(config, logger):
         logger.info("No dependencies to fetch")
         return True
     
-    for dep_name, dep_config in all_deps.items():
-        fetch_dependency(dep_name, dep_config, logger)
-    
+    failed = fetch_dependencies(list(all_deps), all_deps, logger)
+
+    if failed:
+        logger.error(f"Libraries not fetched: {', '.join(sorted(failed))}")
+        return False
     logger.info("All libraries fetched")
     return True
 
 
+def clone_project(project_name, project_config, logger):
+    url = project_config['url']
+    branch = project_config.get('branch', 'main')
+    full_history = project_config.get('full_history', False)
+    return clone_or_update(project_name, url, branch, ROOT_DIR / project_name, logger, full_history)
+
+
+def report_deployment(project_name, success, failed_deps, logger):
+    logger.info("=" * 50)
+    if not success:
+        logger.error(f"Deployment failed: could not clone/update {project_name}")
+    elif failed_deps:
+        failed_list = ', '.join(sorted(failed_deps))
+        logger.error(f"Deployment failed: {project_name} dependencies not fetched: {failed_list}")
+    else:
+        logger.info(f"Deployment completed: {project_name}")
+        logger.info(f"Run 'cd {project_name} && ./setup.sh' to install dependencies")
+    logger.info("=" * 50)
+    return success and not failed_deps
+
+
 def deploy_project(project_name, config, logger):
     if project_name not in config.get('projects', {}):
         logger.error(f"Project '{project_name}' not found in config")
@@ -88,36 +262,61 @@ def deploy_project(project_name, config, logger):
     logger.info("=" * 50)
 
     project_config = config['projects'][project_name]
-    url = project_config['url']
-    branch = project_config.get('branch', 'main')
     deps = project_config.get('dependencies', [])
 
-    project_path = ROOT_DIR / project_name
+    if not deps:
+        logger.info("Cloning/updating project repository")
+        success = clone_project(project_name, project_config, logger)
+        return report_deployment(project_name, success, set(), logger)
 
-    logger.info(f"Step 1: Cloning/updating project repository")
-    if not clone_or_update(project_name, url, branch, project_path, logger):
-        return False
+    # The project checkout and its dependencies are independent, so they are
+    # all submitted up front and awaited together.
+    logger.info(f"Cloning/updating project repository and {len(deps)} dependencies")
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(deps) + 1)) as executor:
+        project_future = executor.submit(clone_project, project_name, project_config, logger)
+        dep_futures = submit_dependencies(executor, deps, config.get('dependencies', {}), logger)
+        failed = wait_dependencies(dep_futures, logger)
+        success = project_future.result()
 
-    if deps:
-        logger.info(f"Step 2: Fetching {len(deps)} dependencies")
-        all_deps = config.get('dependencies', {})
-        for i, dep in enumerate(deps, 1):
-            if dep in all_deps:
-                logger.info(f"[{i}/{len(deps)}]")
-                fetch_dependency(dep, all_deps[dep], logger)
+    return report_deployment(project_name, success, failed, logger)
+
+
+def deploy_all_projects(config, logger):
+    projects = config.get('projects', {})
+    if not projects:
+        return True
 
     logger.info("=" * 50)
-    logger.info(f"Deployment completed: {project_name}")
-    logger.info(f"Run 'cd {project_name} && ./setup.sh' to install dependencies")
+    logger.info(f"Deploying {len(projects)} projects")
     logger.info("=" * 50)
-    return True
+
+    # Projects often share dependencies, so each one is fetched once for the
+    # whole run rather than once per project that lists it. Results are
+    # reported per project only after every fetch has finished.
+    deps = [dep for proj in projects.values() for dep in proj.get('dependencies', [])]
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        dep_futures = submit_dependencies(executor, deps, config.get('dependencies', {}), logger)
+        project_futures = {name: executor.submit(clone_project, name, proj, logger)
+                           for name, proj in projects.items()}
+        failed = wait_dependencies(dep_futures, logger)
+        cloned = {name: future.result() for name, future in project_futures.items()}
+
+    results = []
+    for name, proj in projects.items():
+        failed_deps = failed.intersection(proj.get('dependencies', []))
+        results.append(report_deployment(name, cloned[name], failed_deps, logger))
+    return not failed and all(results)
 
 
 def list_projects(config):
+    with os.scandir(ROOT_DIR) as entries:
+        deployed = {entry.name for entry in entries}
+
     print("\nConfigured Projects:")
     for name, proj in config.get('projects', {}).items():
         branch = proj.get('branch', 'main')
-        status = "Deployed" if (ROOT_DIR / name).exists() else "Not Deployed"
+        status = "Deployed" if name in deployed else "Not Deployed"
         print(f"  - {name} (branch: {branch}) [{status}]")
 
 
@@ -134,23 +333,24 @@ def main():
         print(f"Error: Config file not found: {CONFIG_FILE}")
         sys.exit(1)
 
-    with open(CONFIG_FILE) as f:
-        config = yaml.safe_load(f)
-
+    config = load_config(CONFIG_FILE)
     logger = setup_logging()
 
+    success = True
     if args.list:
         list_projects(config)
     elif args.fetch_libs:
-        fetch_all_libs(config, logger)
+        success = fetch_all_libs(config, logger)
     elif args.all:
-        for project_name in config.get('projects', {}).keys():
-            deploy_project(project_name, config, logger)
+        success = deploy_all_projects(config, logger)
     elif args.project:
-        deploy_project(args.project, config, logger)
+        success = deploy_project(args.project, config, logger)
     else:
         parser.print_help()
 
+    if not success:
+        sys.exit(1)
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
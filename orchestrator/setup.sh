@@ -14,11 +14,17 @@ if [ ! -d "venv" ]; then
     $PYTHON -m venv venv
 fi
 
-echo "Upgrading pip..."
-$VENV_PYTHON -m pip install --upgrade pip
+# uv is an optional, much faster drop-in for pip; use it when installed
+if command -v uv &> /dev/null; then
+    echo "Installing requirements with uv..."
+    uv pip install --python "$VENV_PYTHON" -r requirements.txt
+else
+    echo "Upgrading pip..."
+    $VENV_PYTHON -m pip install --disable-pip-version-check --upgrade pip
 
-echo "Installing requirements..."
-$VENV_PIP install -r requirements.txt
+    echo "Installing requirements..."
+    $VENV_PIP install --disable-pip-version-check -r requirements.txt
+fi
 
 echo ""
 echo "Setup complete!"